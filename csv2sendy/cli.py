@@ -1,12 +1,49 @@
 """Command line interface for CSV2Sendy."""
 
+import argparse
 import sys
+from typing import List
+from csv2sendy.core.merge import KEEP_RULES, merge_files
 from csv2sendy.web.app import app
 
 
+def positive_int(value: str) -> int:
+    """Parse a command line value that must be a positive integer."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, got {value}')
+    return number
+
+
+def merge(args: List[str]) -> None:
+    """Merge CSV files into one, removing duplicate emails."""
+    parser = argparse.ArgumentParser(
+        prog='csv2sendy merge',
+        description='Merge CSV files into one Sendy-ready file, removing duplicate emails.'
+    )
+    parser.add_argument('output', help='path of the merged CSV file')
+    parser.add_argument('inputs', nargs='+', help='CSV files to merge (.csv, .csv.gz or .zip)')
+    parser.add_argument('--keep', choices=KEEP_RULES, default='first',
+                        help='which record wins for a duplicate email (default: first)')
+    parser.add_argument('--workers', type=positive_int, default=None,
+                        help='number of files processed in parallel (default: CPU count)')
+    parser.add_argument('--partitions', type=positive_int, default=64,
+                        help='number of partitions used to bound memory while deduplicating')
+    options = parser.parse_args(args)
+
+    stats = merge_files(options.inputs, options.output, keep=options.keep,
+                        workers=options.workers, partitions=options.partitions)
+    print(f"Merged {stats['sources']} files with {stats['rows']} rows into {options.output}: "
+          f"{stats['duplicates']} duplicates removed, {stats['written']} rows written")
+
+
 def main() -> None:
-    """Start the web application."""
+    """Start the web application, or run the merge command."""
     try:
+        if len(sys.argv) > 1 and sys.argv[1] == 'merge':
+            merge(sys.argv[2:])
+            return
+
         port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
         print(f"Starting CSV2Sendy web interface on http://localhost:{port}")
         app.run(host='0.0.0.0', port=port)
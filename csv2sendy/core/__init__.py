@@ -1,3 +1,5 @@
+from .merge import merge_files, merge_processed_files
 from .processor import CSVProcessor
+from .streaming import CSVStreamProcessor
 
-__all__ = ['CSVProcessor']
+__all__ = ['CSVProcessor', 'CSVStreamProcessor', 'merge_files', 'merge_processed_files']
@@ -0,0 +1,89 @@
+"""Read and write compressed CSV files."""
+
+import gzip
+import zipfile
+import zlib
+from contextlib import contextmanager
+from importlib.util import find_spec
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple, cast
+
+COMPRESSED_EXTENSIONS = ('.csv.gz', '.zip')
+
+# Download formats as (pandas compression, mimetype, file extension)
+COMPRESSION_FORMATS: Dict[str, Tuple[Optional[str], str, str]] = {
+    'csv': (None, 'text/csv', '.csv'),
+    'gz': ('gzip', 'application/gzip', '.csv.gz'),
+    'zip': ('zip', 'application/zip', '.zip'),
+}
+if find_spec('zstandard') is not None:
+    COMPRESSION_FORMATS['zst'] = ('zstd', 'application/zstd', '.csv.zst')
+
+
+def is_compressed(filename: str) -> bool:
+    """Check if a filename has a supported compressed extension."""
+    return filename.lower().endswith(COMPRESSED_EXTENSIONS)
+
+
+def csv_filename(filename: str) -> str:
+    """Get the name of the CSV file inside a possibly compressed file."""
+    lower = filename.lower()
+    if lower.endswith('.gz'):
+        return filename[:-3]
+    if lower.endswith('.zip'):
+        return filename[:-4] + '.csv'
+    return filename
+
+
+class StreamDecompressor:
+    """Incrementally decompress uploaded data as it arrives.
+
+    Gzip data is decompressed in pieces; other data is passed through.
+    Zip archives need random access and are read with open_csv_stream.
+    """
+
+    def __init__(self, filename: str) -> None:
+        """Initialize StreamDecompressor."""
+        self._decompressor: Any = None
+        if filename.lower().endswith('.gz'):
+            self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress the next piece of data."""
+        if self._decompressor is None:
+            return data
+        output = cast(bytes, self._decompressor.decompress(data))
+        # Concatenated gzip members continue in a new decompressor
+        while self._decompressor.eof and self._decompressor.unused_data:
+            remaining = self._decompressor.unused_data
+            self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            output += self._decompressor.decompress(remaining)
+        return output
+
+    def flush(self) -> bytes:
+        """Return any remaining data once all input has been received."""
+        if self._decompressor is None:
+            return b''
+        data = cast(bytes, self._decompressor.flush())
+        if not self._decompressor.eof:
+            raise ValueError('Truncated gzip file')
+        return data
+
+
+@contextmanager
+def open_csv_stream(path: str, filename: str) -> Iterator[BinaryIO]:
+    """Open a CSV file for streaming, decompressing gzip and zip files on the fly."""
+    lower = filename.lower()
+    if lower.endswith('.gz'):
+        with gzip.open(path, 'rb') as f:
+            yield cast(BinaryIO, f)
+    elif lower.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            csv_members = [info for info in members if info.filename.lower().endswith('.csv')]
+            if not csv_members:
+                raise ValueError('No CSV file found in zip archive')
+            with archive.open(csv_members[0]) as member:
+                yield cast(BinaryIO, member)
+    else:
+        with open(path, 'rb') as f:
+            yield f
@@ -0,0 +1,197 @@
+"""Merge and deduplicate many CSV files with bounded memory."""
+
+import csv
+import heapq
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .compression import open_csv_stream
+from .streaming import CSVStreamProcessor
+
+KEEP_RULES = ('first', 'last', 'most_complete')
+STREAM_BLOCK_SIZE = 64 * 1024
+CHUNK_ROWS = 100_000
+
+
+def process_source(path: str, output_path: str) -> int:
+    """Process one source file into a CSV file and return its row count."""
+    csv_stream = CSVStreamProcessor(output_path)
+    with open_csv_stream(path, path) as f:
+        for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+            csv_stream.feed(block)
+    csv_stream.close()
+    return csv_stream.rows
+
+
+def _read_processed(path: str, chunksize: Optional[int] = None) -> Any:
+    """Read a processed CSV file keeping every value as text."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize)
+
+
+def _process_sources(paths: Sequence[str], processed_paths: List[str], workers: Optional[int]) -> List[int]:
+    """Process all source files, in parallel when more than one worker is used.
+
+    Worker processes are spawned rather than forked, so they are safe to
+    start from threaded callers such as the web application.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        results = []
+        if executor is not None:
+            futures = [executor.submit(process_source, path, output)
+                       for path, output in zip(paths, processed_paths)]
+        for i, path in enumerate(paths):
+            try:
+                if executor is not None:
+                    results.append(futures[i].result())
+                else:
+                    results.append(process_source(path, processed_paths[i]))
+            except Exception as e:
+                raise ValueError(f'Error processing {os.path.basename(path)}: {str(e)}')
+        return results
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def _partition(processed_paths: List[str], columns: List[str], partition_dir: str,
+               partitions: int) -> Tuple[List[str], int]:
+    """Split rows into partition files by email hash.
+
+    Returns the partition files written to and the number of rows read.
+
+    Partition files have no header: the first two fields are the source and
+    row number used to restore the original order, followed by the values
+    of columns. Keeping the keys positional means no source column can
+    clash with them.
+    """
+    partition_paths = [os.path.join(partition_dir, f'partition_{i}.csv') for i in range(partitions)]
+    written = set()
+    total = 0
+    for source, path in enumerate(processed_paths):
+        row = 0
+        for chunk in _read_processed(path, chunksize=CHUNK_ROWS):
+            chunk = chunk.reindex(columns=columns, fill_value='')
+            emails = chunk['email']
+            rows = np.arange(row, row + len(chunk))
+            row += len(chunk)
+            total += len(chunk)
+            chunk.columns = range(2, len(columns) + 2)
+            chunk.insert(0, 0, source)
+            chunk.insert(1, 1, rows)
+
+            # Rows without an email are never duplicates, so spread them evenly
+            hashes = pd.util.hash_pandas_object(emails, index=False).to_numpy()
+            keys = np.where(emails == '', rows % partitions,
+                            (hashes % np.uint64(partitions)).astype(np.int64))
+            for key, group in chunk.groupby(keys):
+                group.to_csv(partition_paths[key], mode='a', index=False, header=False)
+                written.add(key)
+    return [partition_paths[key] for key in sorted(written)], total
+
+
+def _dedupe_partition(path: str, columns: List[str], keep: str) -> int:
+    """Remove duplicate emails from a partition file in place, sorted by source order."""
+    df = pd.read_csv(path, header=None, dtype=str, keep_default_na=False)
+    df[0] = df[0].astype(int)
+    df[1] = df[1].astype(int)
+    email = columns.index('email') + 2
+    has_email = df[email] != ''
+
+    if keep == 'most_complete':
+        # Most filled in columns first, then source order
+        emails = df[has_email]
+        filled = (emails[list(range(2, len(columns) + 2))] != '').sum(axis=1).to_numpy()
+        ranked = emails.iloc[np.lexsort((emails[1].to_numpy(), emails[0].to_numpy(), -filled))]
+        unique = ranked.drop_duplicates(subset=[email], keep='first')
+    else:
+        ranked = df[has_email].sort_values([0, 1])
+        unique = ranked.drop_duplicates(subset=[email], keep=keep)
+
+    result = pd.concat([df[~has_email], unique]).sort_values([0, 1])
+    result.to_csv(path, index=False, header=False)
+    return len(df) - len(result)
+
+
+def _iter_rows(path: str) -> Iterator[Tuple[int, int, List[str]]]:
+    """Yield the source, row number and values of each row in a partition file."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for values in csv.reader(f):
+            yield int(values[0]), int(values[1]), values[2:]
+
+
+def _check_merge_options(keep: str, partitions: int) -> None:
+    """Validate the options shared by both merge entry points."""
+    if keep not in KEEP_RULES:
+        raise ValueError(f'Invalid keep rule: {keep}')
+    if partitions < 1:
+        raise ValueError('Partitions must be at least 1')
+
+
+def merge_processed_files(processed_paths: Sequence[str], output_path: str, keep: str = 'first',
+                          partitions: int = 64) -> Dict[str, int]:
+    """Merge files already processed by CSVStreamProcessor, removing duplicate emails.
+
+    This is the second half of merge_files, for callers such as the web
+    application that have processed their sources while receiving them.
+    """
+    _check_merge_options(keep, partitions)
+    if not processed_paths:
+        raise ValueError('No files to merge')
+
+    # Union of all columns in order of first appearance
+    columns: List[str] = []
+    for path in processed_paths:
+        for col in pd.read_csv(path, nrows=0).columns:
+            if col not in columns:
+                columns.append(col)
+    if 'email' not in columns:
+        raise ValueError('No email column found')
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as work_dir:
+        partition_paths, rows = _partition(list(processed_paths), columns, work_dir, partitions)
+        duplicates = sum(_dedupe_partition(path, columns, keep) for path in partition_paths)
+
+        written = 0
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(columns)
+            for _, _, values in heapq.merge(*(_iter_rows(path) for path in partition_paths)):
+                writer.writerow(values)
+                written += 1
+
+    return {
+        'sources': len(processed_paths),
+        'rows': rows,
+        'duplicates': duplicates,
+        'written': written
+    }
+
+
+def merge_files(paths: Sequence[str], output_path: str, keep: str = 'first',
+                workers: Optional[int] = None, partitions: int = 64) -> Dict[str, int]:
+    """Merge CSV files into one, removing duplicate emails across all of them.
+
+    Each file is processed on its own, with its own delimiter and column
+    mapping, in parallel. Rows are then hash partitioned by email so only one
+    partition is held in memory while deduplicating, and the partitions are
+    merged back in source order. The keep rule decides which duplicate wins:
+    the first or last seen, or the one with the most filled in columns.
+    """
+    _check_merge_options(keep, partitions)
+    if not paths:
+        raise ValueError('No files to merge')
+    if workers is not None and workers < 1:
+        raise ValueError('Workers must be at least 1')
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as work_dir:
+        processed_paths = [os.path.join(work_dir, f'source_{i}.csv') for i in range(len(paths))]
+        _process_sources(paths, processed_paths, workers)
+        return merge_processed_files(processed_paths, output_path, keep=keep, partitions=partitions)
@@ -1,15 +1,23 @@
 """Process CSV files for Sendy compatibility."""
 
 import re
-from typing import Dict, Optional, Any
+from importlib.util import find_spec
+from typing import Any, Dict, List, Literal, Optional, cast
 import pandas as pd
 from io import StringIO
 from email_validator import validate_email, EmailNotValidError
 
 
+# Use Arrow-backed strings when pyarrow is available, Python strings otherwise
+STRING_STORAGE: Literal['python', 'pyarrow'] = 'pyarrow' if find_spec('pyarrow') is not None else 'python'
+
+
 class CSVProcessor:
     """Process CSV files for Sendy compatibility."""
 
+    # Text columns whose unique/total ratio is at or below this become categorical
+    category_threshold = 0.5
+
     def __init__(self) -> None:
         """Initialize CSVProcessor."""
         self.column_mapping = {
@@ -131,19 +139,85 @@ class CSVProcessor:
         df = df.drop('phone', axis=1)
         return df
 
-    def process_csv(self, content: str) -> pd.DataFrame:
-        """Process CSV content."""
-        delimiter = self.detect_delimiter(content)
-        df = pd.read_csv(StringIO(content), delimiter=delimiter)
+    def _is_text_column(self, series: pd.Series) -> bool:
+        """Check if a column holds text stored as objects or strings."""
+        return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+    def _is_digit_column(self, series: pd.Series) -> bool:
+        """Check if every value is empty or digits that round-trip through an integer."""
+        values = series.dropna().astype(str)
+        return bool(values.str.fullmatch(r'(?:[1-9]\d{0,18})?').all())
+
+    def compact_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Convert text columns to a compact in-memory representation.
+
+        Low-cardinality text columns become categorical, the remaining text
+        columns use the pandas string dtype and ``phone_number`` is stored as
+        nullable unsigned integers. Writing the result with ``to_csv`` gives
+        the same output as the uncompacted dataframe.
+        """
+        df = df.copy()
+        for col in df.columns:
+            series = df[col]
+            if not self._is_text_column(series):
+                continue
+            if col == 'phone_number' and self._is_digit_column(series):
+                df[col] = pd.array(
+                    [int(value) if not pd.isna(value) and value else pd.NA for value in series],
+                    dtype='UInt64'
+                )
+            elif len(series) and series.nunique() / len(series) <= self.category_threshold:
+                df[col] = series.astype('category')
+            else:
+                df[col] = series.astype(pd.StringDtype(STRING_STORAGE))
+        return df
+
+    def memory_usage(self, df: pd.DataFrame) -> Dict[str, int]:
+        """Report memory usage in bytes per column, plus the total."""
+        usage = {str(col): int(size) for col, size in df.memory_usage(index=False, deep=True).items()}
+        usage['total'] = sum(usage.values())
+        return usage
+
+    def to_records(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Convert a dataframe to records, replacing missing values with empty strings."""
+        data = df.astype(object).where(df.notna(), '')
+        if 'phone_number' in df.columns and df['phone_number'].dtype == 'UInt64':
+            data['phone_number'] = data['phone_number'].map(str)
+        return cast(List[Dict[str, Any]], data.to_dict('records'))
+
+    def _process_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Run the processing steps on a freshly read dataframe."""
         df = self._standardize_columns(df)
         df = self._process_names(df)
         df = self._process_emails(df)
         df = self._process_phones(df)
         return df
 
-    def process_file(self, file_content: str) -> pd.DataFrame:
+    def _read_csv(self, content: str, delimiter: str) -> pd.DataFrame:
+        """Read CSV content keeping every value as text, exactly as written.
+
+        Whole files and chunks of a file are read the same way, so their
+        columns and formatting never depend on which rows were read.
+        """
+        return pd.read_csv(StringIO(content), delimiter=delimiter, dtype=str)
+
+    def process_csv(self, content: str, compact: bool = False) -> pd.DataFrame:
+        """Process CSV content."""
+        delimiter = self.detect_delimiter(content)
+        df = self._read_csv(content, delimiter)
+        df = self._process_dataframe(df)
+        if compact:
+            df = self.compact_dataframe(df)
+        return df
+
+    def process_chunk(self, header: str, rows: str, delimiter: str) -> pd.DataFrame:
+        """Process a chunk of CSV rows that arrived without the header line."""
+        df = self._read_csv(header + rows, delimiter)
+        return self._process_dataframe(df)
+
+    def process_file(self, file_content: str, compact: bool = False) -> pd.DataFrame:
         """Process a CSV file."""
         try:
-            return self.process_csv(file_content)
+            return self.process_csv(file_content, compact=compact)
         except Exception as e:
             raise ValueError(f"Error processing CSV file: {str(e)}")
@@ -0,0 +1,156 @@
+"""Process CSV data incrementally as it arrives."""
+
+import re
+from typing import Optional
+from .processor import CSVProcessor
+
+
+# Scanner states
+FIELD_START, UNQUOTED, QUOTED, QUOTE_IN_QUOTED = range(4)
+
+
+class RecordScanner:
+    """Find CSV record boundaries in data that keeps growing.
+
+    A quote only opens a quoted field at the start of a field, as in pandas,
+    so a stray quote inside an unquoted value does not swallow the following
+    records. The scan position and state are kept between calls, so each
+    byte is only scanned once.
+    """
+
+    def __init__(self, delimiters: bytes = b',;') -> None:
+        """Initialize RecordScanner with the possible field delimiters."""
+        self.pos = 0
+        self.state = FIELD_START
+        self.set_delimiters(delimiters)
+
+    def set_delimiters(self, delimiters: bytes) -> None:
+        """Change the field delimiters, e.g. once the header is known."""
+        self._delimiters = delimiters
+        # Inside an unquoted field only a newline or a new quoted field matter
+        self._unquoted = re.compile(b'\n|[' + re.escape(delimiters) + b']"')
+
+    def scan(self, data: bytes, first: bool = False) -> int:
+        """Scan data from the last position and return the end of the last new record.
+
+        Stops at the first record found when first is set. Returns 0 when no
+        record ends in the newly scanned data.
+        """
+        end = 0
+        pos, state = self.pos, self.state
+        size = len(data)
+        while pos < size:
+            if state == QUOTED:
+                pos = data.find(b'"', pos) + 1
+                if not pos:
+                    pos = size
+                    break
+                state = QUOTE_IN_QUOTED
+            elif state == UNQUOTED:
+                match = self._unquoted.search(data, pos)
+                if match is None:
+                    if data[-1:] in self._delimiters:
+                        state = FIELD_START
+                    pos = size
+                    break
+                pos = match.end()
+                if match.group() == b'\n':
+                    state = FIELD_START
+                    end = pos
+                    if first:
+                        break
+                else:
+                    state = QUOTED
+            else:
+                byte = data[pos:pos + 1]
+                if byte == b'"':
+                    # Opens a quoted field, or is an escaped quote inside one
+                    state = QUOTED
+                    pos += 1
+                elif byte == b'\n':
+                    state = FIELD_START
+                    pos += 1
+                    end = pos
+                    if first:
+                        break
+                elif byte in self._delimiters:
+                    state = FIELD_START
+                    pos += 1
+                else:
+                    state = UNQUOTED
+        self.pos, self.state = pos, state
+        return end
+
+
+def find_record_end(data: bytes, last: bool = True) -> int:
+    """Find the end of the last (or first) complete CSV record in data.
+
+    Newlines inside quoted fields do not end a record. Returns 0 when data
+    holds no complete record.
+    """
+    return RecordScanner().scan(data, first=not last)
+
+
+class CSVStreamProcessor:
+    """Process CSV data fed in arbitrary pieces and append the result to a file."""
+
+    def __init__(self, output_path: str, processor: Optional[CSVProcessor] = None) -> None:
+        """Initialize CSVStreamProcessor."""
+        self.output_path = output_path
+        self.processor = processor or CSVProcessor()
+        self.header: Optional[str] = None
+        self.delimiter = ','
+        self.rows = 0
+        self._pending = b''
+        self._written = False
+        self._scanner = RecordScanner()
+
+    def feed(self, data: bytes) -> None:
+        """Process the complete records available after adding data."""
+        self._pending += data
+        if self.header is None:
+            header_end = self._scanner.scan(self._pending, first=True)
+            if not header_end:
+                return
+            self._set_header(self._pending[:header_end])
+            self._take(header_end)
+        end = self._scanner.scan(self._pending)
+        if end:
+            self._write(self._take(end).decode('utf-8'))
+
+    def close(self) -> None:
+        """Process any trailing record that does not end with a newline."""
+        if self.header is None:
+            if not self._pending.strip():
+                raise ValueError('Empty file')
+            self._set_header(self._pending)
+            self._pending = b''
+        rows = self._pending.decode('utf-8')
+        self._pending = b''
+        self._write(rows)
+
+    def _set_header(self, data: bytes) -> None:
+        """Store the header line and detect the delimiter from it."""
+        header = data.decode('utf-8')
+        if not header.endswith('\n'):
+            header += '\n'
+        self.header = header
+        self.delimiter = self.processor.detect_delimiter(header)
+        self._scanner.set_delimiters(self.delimiter.encode('utf-8'))
+
+    def _take(self, end: int) -> bytes:
+        """Remove and return the pending data before end."""
+        data = self._pending[:end]
+        self._pending = self._pending[end:]
+        self._scanner.pos -= end
+        return data
+
+    def _write(self, rows: str) -> None:
+        """Process rows and append them to the output file."""
+        if not rows.strip() and self._written:
+            return
+        df = self.processor.process_chunk(str(self.header), rows, self.delimiter)
+        df.to_csv(self.output_path, mode='a' if self._written else 'w', index=False,
+                  header=not self._written)
+        self.rows += len(df)
+        self._written = True
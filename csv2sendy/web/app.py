@@ -5,6 +5,9 @@ It includes routes for file upload, processing, and download with custom column
 
 Key Features:
     - File upload with multiple encoding support
+    - Resumable chunked uploads processed while chunks are still arriving
+    - Gzip and zip compressed uploads and compressed downloads
+    - Merging many files into one with duplicate emails removed
     - CSV processing with Brazilian data format support
     - Custom column mapping
     - Tag addition
@@ -12,22 +15,50 @@ Key Features:
 """
 
 import os
+import re
+import shutil
 import tempfile
+import threading
 import time
 import json
-from typing import Tuple, Union, cast
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 from flask import Flask, request, send_file, jsonify, render_template, Response, url_for
 from werkzeug.utils import secure_filename
 from werkzeug.wrappers import Response as WerkzeugResponse
+from csv2sendy.core.compression import (
+    COMPRESSION_FORMATS, StreamDecompressor, csv_filename, is_compressed, open_csv_stream
+)
+from csv2sendy.core.merge import KEEP_RULES, merge_processed_files
 from csv2sendy.core.processor import CSVProcessor
+from csv2sendy.core.streaming import CSVStreamProcessor
 import pandas as pd
 
 
 TEMP_DIR = tempfile.gettempdir()
 app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max-limit
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max-limit per request or chunk
 app.config['UPLOAD_FOLDER'] = TEMP_DIR
 app.config['ALLOWED_EXTENSIONS'] = {'csv', 'txt'}
+app.config['PREVIEW_ROWS'] = 100  # rows returned in the preview of an upload
+app.config['UPLOAD_EXPIRY'] = 24 * 60 * 60  # seconds an idle chunked upload is kept
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+UPLOAD_PART_PATTERN = re.compile(r'^upload_([0-9a-f]{32})\.part$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Per-upload append locks, single-thread workers that process chunks in order
+# and the decompressor and stream processor each worker feeds
+_upload_locks: Dict[str, threading.Lock] = {}
+_upload_workers: Dict[str, ThreadPoolExecutor] = {}
+_upload_streams: Dict[str, Tuple[StreamDecompressor, CSVStreamProcessor]] = {}
+_uploads_lock = threading.Lock()
+
+# Merge jobs by id, run one at a time in the background
+_merge_jobs: Dict[str, Dict[str, Any]] = {}
+_merge_executor = ThreadPoolExecutor(max_workers=1)
 
 
 def cleanup_temp_files() -> None:
@@ -37,12 +68,222 @@ def cleanup_temp_files() -> None:
             os.remove(os.path.join(TEMP_DIR, filename))
 
 
+def allowed_upload(filename: str) -> bool:
+    """Check if an uploaded file is a CSV file, optionally compressed."""
+    return filename.endswith('.csv') or is_compressed(filename)
+
+
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
 
+def _upload_path(upload_id: str, suffix: str) -> str:
+    """Get the path of a file belonging to a chunked upload."""
+    return os.path.join(app.config['UPLOAD_FOLDER'], f'upload_{upload_id}.{suffix}')
+
+
+def _load_upload_state(upload_id: str) -> Optional[Dict[str, Any]]:
+    """Load the state of a chunked upload, or None if it does not exist."""
+    if not UPLOAD_ID_PATTERN.match(upload_id):
+        return None
+    try:
+        with open(_upload_path(upload_id, 'json'), 'r', encoding='utf-8') as f:
+            return cast(Dict[str, Any], json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+def _save_upload_state(upload_id: str, state: Dict[str, Any]) -> None:
+    """Persist the state of a chunked upload."""
+    path = _upload_path(upload_id, 'json')
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _update_upload_state(upload_id: str, **changes: Any) -> None:
+    """Change some fields of a chunked upload's state, unless it was discarded.
+
+    Only the given fields are written, so the worker recording its progress
+    cannot undo a request marking the upload completed, or the other way round.
+    """
+    with _uploads_lock:
+        state = _load_upload_state(upload_id)
+        if state is not None:
+            state.update(changes)
+            _save_upload_state(upload_id, state)
+
+
+def _get_upload_lock(upload_id: str) -> threading.Lock:
+    """Get the lock serializing appends to a chunked upload."""
+    with _uploads_lock:
+        return _upload_locks.setdefault(upload_id, threading.Lock())
+
+
+def _get_upload_worker(upload_id: str) -> ThreadPoolExecutor:
+    """Get the worker that processes a chunked upload's received data."""
+    with _uploads_lock:
+        if upload_id not in _upload_workers:
+            _upload_workers[upload_id] = ThreadPoolExecutor(max_workers=1)
+        return _upload_workers[upload_id]
+
+
+def _stop_upload_worker(upload_id: str) -> None:
+    """Wait for a chunked upload's pending work and shut its worker down."""
+    with _uploads_lock:
+        worker = _upload_workers.pop(upload_id, None)
+    if worker is not None:
+        worker.shutdown(wait=True)
+
+
+def _discard_upload(upload_id: str) -> None:
+    """Remove a chunked upload's files and in-memory state."""
+    for suffix in ('part', 'json', 'json.tmp', 'processed'):
+        path = _upload_path(upload_id, suffix)
+        if os.path.exists(path):
+            os.remove(path)
+    with _uploads_lock:
+        _upload_locks.pop(upload_id, None)
+        _upload_streams.pop(upload_id, None)
+
+
+def expire_stale_uploads() -> None:
+    """Remove chunked uploads that received no data within the expiry time."""
+    cutoff = time.time() - app.config['UPLOAD_EXPIRY']
+    for filename in os.listdir(app.config['UPLOAD_FOLDER']):
+        match = UPLOAD_PART_PATTERN.match(filename)
+        if not match:
+            continue
+        upload_id = match.group(1)
+        path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        with _get_upload_lock(upload_id):
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            _stop_upload_worker(upload_id)
+            _discard_upload(upload_id)
+            app.logger.info(f'Expired chunked upload {upload_id}')
+
+
+def _get_upload_stream(upload_id: str, state: Dict[str, Any]) -> Tuple[StreamDecompressor, CSVStreamProcessor]:
+    """Get the decompressor and stream processor of a chunked upload."""
+    with _uploads_lock:
+        if upload_id not in _upload_streams:
+            # Nothing processed survives a restart, so start over from the first byte
+            state['processed'] = 0
+            _upload_streams[upload_id] = (
+                StreamDecompressor(state['filename']),
+                CSVStreamProcessor(_upload_path(upload_id, 'processed'))
+            )
+        return _upload_streams[upload_id]
+
+
+def _process_received(upload_id: str, final: bool = False) -> None:
+    """Process the complete records received so far for a chunked upload.
+
+    When final is set, any trailing record without a newline is processed too.
+    Zip archives need random access, so they are only processed once final.
+    Runs on the upload's single worker, so it never overlaps with itself.
+    """
+    state = _load_upload_state(upload_id)
+    if state is None or state['error']:
+        return
+    part_path = _upload_path(upload_id, 'part')
+    try:
+        decompressor, csv_stream = _get_upload_stream(upload_id, state)
+        if not state['filename'].lower().endswith('.zip'):
+            with open(part_path, 'rb') as f:
+                f.seek(state['processed'])
+                for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+                    state['processed'] += len(block)
+                    csv_stream.feed(decompressor.decompress(block))
+            if final:
+                csv_stream.feed(decompressor.flush())
+        elif final:
+            with open_csv_stream(part_path, state['filename']) as f:
+                for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+                    csv_stream.feed(block)
+        if final:
+            csv_stream.close()
+    except UnicodeDecodeError:
+        state['error'] = 'Invalid file encoding'
+    except Exception as e:
+        state['error'] = str(e)
+    _update_upload_state(upload_id, processed=state['processed'], error=state['error'])
+
+
+def _processed_response(output_filename: str, **extra: Any) -> Tuple[Response, int]:
+    """Build the upload response from a processed file streamed to disk."""
+    output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+    preview = pd.read_csv(output_path, nrows=app.config['PREVIEW_ROWS'], dtype=str)
+    download_url = url_for('download_file', filename=output_filename)
+
+    result: Dict[str, Any] = {
+        'message': 'File processed successfully',
+        'download_url': download_url,
+        'data': CSVProcessor().to_records(preview),
+        'headers': preview.columns.tolist()
+    }
+    result.update(extra)
+    return jsonify(result), 200
+
+
+def _run_merge_job(job_id: str, upload_ids: List[str], output_path: str, keep: str) -> None:
+    """Run a merge job in the background and record its outcome.
+
+    Each upload is finished like a completed one, so the records its worker
+    already processed while chunks arrived are reused rather than processed
+    again, and the processed files are merged.
+    """
+    job = _merge_jobs[job_id]
+    job['status'] = 'running'
+    work_dir = tempfile.mkdtemp(prefix=f'merge_{job_id}_', dir=app.config['UPLOAD_FOLDER'])
+    try:
+        paths = []
+        for i, upload_id in enumerate(upload_ids):
+            with _get_upload_lock(upload_id):
+                _stop_upload_worker(upload_id)
+                _process_received(upload_id, final=True)
+                state = _load_upload_state(upload_id)
+                if state is None:
+                    raise ValueError('Upload not found')
+                if state['error']:
+                    raise ValueError(f'Error processing {state["filename"]}: {state["error"]}')
+                path = os.path.join(work_dir, f'source_{i}.csv')
+                os.replace(_upload_path(upload_id, 'processed'), path)
+                paths.append(path)
+                _discard_upload(upload_id)
+        job['stats'] = merge_processed_files(paths, output_path, keep=keep)
+        job['status'] = 'done'
+        app.logger.info(f'Merge job {job_id} wrote {output_path}: '
+                        f'{job["stats"]["duplicates"]} duplicates removed')
+    except Exception as e:
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        app.logger.error(f'Error in merge job {job_id}: {str(e)}')
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    finally:
+        job['finished'] = time.time()
+        for upload_id in upload_ids:
+            with _get_upload_lock(upload_id):
+                _stop_upload_worker(upload_id)
+                _discard_upload(upload_id)
+        shutil.rmtree(work_dir)
+
+
+def _expire_merge_jobs() -> None:
+    """Forget merge jobs that finished longer ago than the upload expiry time."""
+    cutoff = time.time() - app.config['UPLOAD_EXPIRY']
+    for job_id, job in list(_merge_jobs.items()):
+        if job['finished'] is not None and job['finished'] < cutoff:
+            _merge_jobs.pop(job_id, None)
+
+
 @app.route('/')
 def home() -> str:
     """Render home page."""
@@ -59,44 +300,34 @@ def upload_file() -> Tuple[Response, int]:
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    if not file.filename.endswith('.csv'):
+    if not allowed_upload(file.filename):
         return jsonify({'error': 'Invalid file type'}), 400
 
     try:
-        filename = secure_filename(file.filename)
+        filename = secure_filename(cast(str, file.filename))
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(filepath)
         app.logger.info(f'File saved to {filepath}')
 
-        # Process the file
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        processor = CSVProcessor()
-        df = processor.process_csv(content)
-
-        # Convert DataFrame to dictionary, replacing NaN with empty string
-        df = df.fillna('')
-        data = df.to_dict('records')
-        headers = df.columns.tolist()
-        app.logger.info(f'Processed headers: {headers}')
-
-        # Save processed file with timestamp to avoid conflicts
+        # Decompress and process on the fly instead of loading the whole file
         timestamp = int(time.time())
-        output_filename = f'processed_{timestamp}_{filename}'
+        output_filename = f'processed_{timestamp}_{csv_filename(filename)}'
         output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
-        df.to_csv(output_path, index=False)
-        app.logger.info(f'Processed file saved to {output_path}')
-
-        download_url = url_for('download_file', filename=output_filename)
-        app.logger.info(f'Download URL: {download_url}')
-
-        return jsonify({
-            'message': 'File processed successfully',
-            'download_url': download_url,
-            'data': data,
-            'headers': headers
-        }), 200
+        csv_stream = CSVStreamProcessor(output_path)
+        try:
+            with open_csv_stream(filepath, filename) as f:
+                for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b''):
+                    csv_stream.feed(block)
+            csv_stream.close()
+        except Exception:
+            # Never leave a partial file behind for /download to pick up
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+        finally:
+            os.remove(filepath)
+        app.logger.info(f'Processed {csv_stream.rows} rows to {output_path}')
+        return _processed_response(output_filename)
 
     except UnicodeDecodeError:
         app.logger.error('Invalid file encoding')
@@ -106,6 +337,202 @@ def upload_file() -> Tuple[Response, int]:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/uploads', methods=['POST'])
+def create_upload() -> Tuple[Response, int]:
+    """Start a resumable chunked upload."""
+    payload = request.get_json(silent=True) or request.form
+    filename = payload.get('filename', '')
+    if not filename:
+        return jsonify({'error': 'No filename provided'}), 400
+
+    if not allowed_upload(filename):
+        return jsonify({'error': 'Invalid file type'}), 400
+
+    expire_stale_uploads()
+
+    upload_id = uuid.uuid4().hex
+    open(_upload_path(upload_id, 'part'), 'wb').close()
+    _save_upload_state(upload_id, {
+        'filename': secure_filename(filename),
+        'processed': 0,
+        'completed': False,
+        'error': None
+    })
+    app.logger.info(f'Started chunked upload {upload_id} for {filename}')
+
+    return jsonify({
+        'upload_id': upload_id,
+        'offset': 0,
+        'upload_url': url_for('upload_chunk', upload_id=upload_id)
+    }), 201
+
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id: str) -> Tuple[Response, int]:
+    """Report how many bytes of a chunked upload have been received."""
+    if _load_upload_state(upload_id) is None:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    offset = os.path.getsize(_upload_path(upload_id, 'part'))
+    return jsonify({'upload_id': upload_id, 'offset': offset}), 200
+
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id: str) -> Tuple[Response, int]:
+    """Append a chunk to a chunked upload at the given offset."""
+    if _load_upload_state(upload_id) is None:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'No offset provided'}), 400
+
+    part_path = _upload_path(upload_id, 'part')
+    with _get_upload_lock(upload_id):
+        # The upload may have been completed or expired while waiting for the lock
+        state = _load_upload_state(upload_id)
+        if state is None:
+            _discard_upload(upload_id)
+            return jsonify({'error': 'Upload not found'}), 404
+        if state['completed']:
+            return jsonify({'error': 'Upload already completed'}), 409
+
+        current = os.path.getsize(part_path)
+        if offset != current:
+            return jsonify({'error': 'Offset mismatch', 'offset': current}), 409
+
+        # Stream the body straight to disk
+        with open(part_path, 'ab') as f:
+            while True:
+                block = request.stream.read(STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                f.write(block)
+        current = os.path.getsize(part_path)
+
+        # Process complete records in the background while later chunks arrive
+        _get_upload_worker(upload_id).submit(_process_received, upload_id)
+
+    return jsonify({'upload_id': upload_id, 'offset': current}), 200
+
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id: str) -> Tuple[Response, int]:
+    """Finish a chunked upload and return the processed data."""
+    if _load_upload_state(upload_id) is None:
+        return jsonify({'error': 'Upload not found'}), 404
+
+    with _get_upload_lock(upload_id):
+        state = _load_upload_state(upload_id)
+        if state is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        if state['completed']:
+            return jsonify({'error': 'Upload already completed'}), 409
+
+        # Later chunks are rejected while the remaining data is processed
+        _stop_upload_worker(upload_id)
+        _update_upload_state(upload_id, completed=True)
+        _process_received(upload_id, final=True)
+        state = cast(Dict[str, Any], _load_upload_state(upload_id))
+
+        output_filename = f'processed_{int(time.time())}_{csv_filename(state["filename"])}'
+        if not state['error']:
+            output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+            os.replace(_upload_path(upload_id, 'processed'), output_path)
+            app.logger.info(f'Processed file saved to {output_path}')
+        _discard_upload(upload_id)
+
+    if state['error']:
+        app.logger.error(f'Error processing upload {upload_id}: {state["error"]}')
+        return jsonify({'error': state['error']}), 500
+
+    try:
+        return _processed_response(output_filename)
+
+    except Exception as e:
+        app.logger.error(f'Error processing file: {str(e)}')
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/merge', methods=['POST'])
+def merge_uploads() -> Tuple[Response, int]:
+    """Start a job merging chunked uploads into one file, removing duplicate emails.
+
+    The uploads must have all their chunks sent through /uploads but not be
+    completed; they are marked completed and the job takes them over. Poll
+    the returned status URL for the result.
+    """
+    payload = request.get_json(silent=True) or {}
+    upload_ids = payload.get('upload_ids')
+    if not upload_ids or not isinstance(upload_ids, list) or \
+            not all(isinstance(upload_id, str) for upload_id in upload_ids):
+        return jsonify({'error': 'No uploads provided'}), 400
+
+    if len(set(upload_ids)) != len(upload_ids):
+        return jsonify({'error': 'Duplicate uploads provided'}), 400
+
+    keep = payload.get('keep', 'first')
+    if keep not in KEEP_RULES:
+        return jsonify({'error': 'Invalid keep rule'}), 400
+
+    if any(_load_upload_state(upload_id) is None for upload_id in upload_ids):
+        return jsonify({'error': 'Upload not found'}), 404
+
+    _expire_merge_jobs()
+    job_id = uuid.uuid4().hex
+    with ExitStack() as stack:
+        # Lock in a fixed order so concurrent merges cannot deadlock
+        for upload_id in sorted(upload_ids):
+            stack.enter_context(_get_upload_lock(upload_id))
+        loaded = [_load_upload_state(upload_id) for upload_id in upload_ids]
+        if any(state is None for state in loaded):
+            return jsonify({'error': 'Upload not found'}), 404
+        states = cast(List[Dict[str, Any]], loaded)
+        if any(state['completed'] for state in states):
+            return jsonify({'error': 'Upload already completed'}), 409
+        for state in states:
+            if state['error']:
+                return jsonify({'error': f'Error processing {state["filename"]}: {state["error"]}'}), 500
+
+        # Later chunks are rejected; the uploads' workers keep processing until the job runs
+        for upload_id in upload_ids:
+            _update_upload_state(upload_id, completed=True)
+
+    output_filename = f'processed_{int(time.time())}_merged_{job_id}.csv'
+    output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
+    _merge_jobs[job_id] = {
+        'status': 'queued',
+        'output_filename': output_filename,
+        'stats': None,
+        'error': None,
+        'finished': None
+    }
+    _merge_executor.submit(_run_merge_job, job_id, upload_ids, output_path, keep)
+    app.logger.info(f'Queued merge job {job_id} for {len(upload_ids)} uploads')
+
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('merge_status', job_id=job_id)
+    }), 202
+
+
+@app.route('/merge/<job_id>', methods=['GET'])
+def merge_status(job_id: str) -> Tuple[Response, int]:
+    """Report the status of a merge job, with the merged data once it is done."""
+    job = _merge_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Merge job not found'}), 404
+
+    if job['status'] == 'failed':
+        return jsonify({'job_id': job_id, 'status': 'failed', 'error': job['error']}), 500
+
+    if job['status'] != 'done':
+        return jsonify({'job_id': job_id, 'status': job['status']}), 202
+
+    return _processed_response(job['output_filename'], job_id=job_id, status='done', stats=job['stats'])
+
+
 @app.route('/download', methods=['POST'])
 def download_file() -> Union[Response, Tuple[Response, int]]:
     """Download processed file with column configuration."""
@@ -121,6 +548,17 @@ def download_file() -> Union[Response, Tuple[Response, int]]:
         tag = request.form.get('tag', '')
         remove_duplicates = request.form.get('remove_duplicates', 'false').lower() == 'true'
         remove_empty = request.form.get('remove_empty', 'false').lower() == 'true'
+        output_format = request.form.get('format', 'csv')
+        if output_format not in COMPRESSION_FORMATS:
+            return jsonify({'error': 'Unsupported format'}), 400
+
+        # Plain CSV is gzip encoded in transit when the client accepts it
+        content_encoding = None
+        if output_format == 'csv' and request.accept_encodings['gzip']:
+            content_encoding = 'gzip'
+        compression, _, extension = COMPRESSION_FORMATS['gz' if content_encoding else output_format]
+        _, mimetype, download_extension = COMPRESSION_FORMATS[output_format]
+        download_name = f'processed{download_extension}'
         
         # Find the most recent uploaded file
         files = [f for f in os.listdir(app.config['UPLOAD_FOLDER']) 
@@ -133,11 +571,11 @@ def download_file() -> Union[Response, Tuple[Response, int]]:
         
         # Create output filename
         timestamp = int(time.time())
-        output_filename = f'processed_{timestamp}.csv'
+        output_filename = f'processed_{timestamp}{extension}'
         output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
         
-        # Read and process the file
-        df = pd.read_csv(input_path)
+        # Read and process the file, keeping values such as zip codes as text
+        df = pd.read_csv(input_path, dtype=str, keep_default_na=False)
         
         # Apply filters
         if remove_duplicates:
@@ -147,7 +585,7 @@ def download_file() -> Union[Response, Tuple[Response, int]]:
             
         if remove_empty:
             original_len = len(df)
-            df = df.dropna(subset=['email'])
+            df = df[df['email'] != '']
             app.logger.info(f'Removed {original_len - len(df)} empty emails')
             
         # Add tag if provided
@@ -158,19 +596,26 @@ def download_file() -> Union[Response, Tuple[Response, int]]:
         column_order = [col['originalName'] for col in columns]
         df = df[column_order]
         
-        # Save to temporary file
-        df.to_csv(output_path, index=False)
+        # Save to temporary file, compressing while the CSV is written
+        if compression == 'zip':
+            df.to_csv(output_path, index=False,
+                      compression={'method': 'zip', 'archive_name': 'processed.csv'})
+        else:
+            df.to_csv(output_path, index=False, compression=compression)
         
         # Send file
         response = send_file(
             output_path,
-            mimetype='text/csv',
+            mimetype=mimetype,
             as_attachment=True,
-            download_name='processed.csv'
+            download_name=download_name
         )
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+            response.headers['Vary'] = 'Accept-Encoding'
         
         # Add headers to force download
-        response.headers['Content-Disposition'] = 'attachment; filename="processed.csv"'
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
@@ -34,33 +34,18 @@ fileInput.addEventListener('change', (e) => {
 
 // Process the uploaded file
 function processFile(file) {
-    if (!file.name.endsWith('.csv')) {
+    if (!/\.(csv|csv\.gz|zip)$/i.test(file.name)) {
         alert('Please upload a CSV file');
         return;
     }
 
     // Set default tag value from filename
-    const tagValue = file.name.replace('.csv', '');
+    const tagValue = file.name.replace(/\.(csv|csv\.gz|zip)$/i, '');
     document.getElementById('tagValue').value = tagValue;
 
     loading.style.display = 'block';
 
-    const formData = new FormData();
-    formData.append('file', file);
-
-    fetch('/upload', {
-        method: 'POST',
-        body: formData,
-        credentials: 'same-origin'  // Include cookies for session handling
-    })
-    .then(response => {
-        if (!response.ok) {
-            return response.json().then(data => {
-                throw new Error(data.error || 'Network response was not ok');
-            });
-        }
-        return response.json();
-    })
+    uploadInChunks(file)
     .then(data => {
         if (data.error) {
             throw new Error(data.error);
@@ -77,6 +62,120 @@ function processFile(file) {
     });
 }
 
+// Chunked upload settings
+const CHUNK_SIZE = 4 * 1024 * 1024;
+const MAX_CHUNK_RETRIES = 8;
+const MAX_RETRY_DELAY = 30000;
+
+// Parse a JSON response, throwing on errors
+async function parseResponse(response) {
+    const data = await response.json();
+    if (!response.ok) {
+        throw new Error(data.error || 'Network response was not ok');
+    }
+    return data;
+}
+
+// Wait before retrying, doubling the delay on every attempt
+function retryDelay(attempt) {
+    const delay = Math.min(1000 * 2 ** (attempt - 1), MAX_RETRY_DELAY);
+    return new Promise(resolve => setTimeout(resolve, delay));
+}
+
+// Key identifying a file across retries and page reloads
+function uploadKey(file) {
+    return `upload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+// Get the server offset of an upload, or null if it is unknown or unreachable
+async function fetchUploadOffset(uploadUrl) {
+    try {
+        const response = await fetch(uploadUrl, {credentials: 'same-origin'});
+        if (response.ok) {
+            return (await response.json()).offset;
+        }
+        if (response.status === 404) {
+            return -1;
+        }
+    } catch (error) {
+        console.warn('Could not reach server for upload status:', error);
+    }
+    return null;
+}
+
+// Resume the stored upload of a file, or start a new one
+async function startUpload(file) {
+    const stored = sessionStorage.getItem(uploadKey(file));
+    if (stored) {
+        const upload = JSON.parse(stored);
+        const offset = await fetchUploadOffset(upload.upload_url);
+        if (offset !== null && offset >= 0) {
+            return {upload, offset};
+        }
+        sessionStorage.removeItem(uploadKey(file));
+    }
+
+    const upload = await parseResponse(await fetch('/uploads', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({filename: file.name}),
+        credentials: 'same-origin'
+    }));
+    sessionStorage.setItem(uploadKey(file), JSON.stringify({
+        upload_id: upload.upload_id,
+        upload_url: upload.upload_url
+    }));
+    return {upload, offset: upload.offset};
+}
+
+// Upload a file in resumable chunks and return the processed data
+async function uploadInChunks(file) {
+    let {upload, offset} = await startUpload(file);
+    let retries = 0;
+    while (offset < file.size) {
+        const chunk = file.slice(offset, offset + CHUNK_SIZE);
+        try {
+            const response = await fetch(`${upload.upload_url}?offset=${offset}`, {
+                method: 'PUT',
+                body: chunk,
+                credentials: 'same-origin'
+            });
+            if (response.status === 404) {
+                // Upload expired on the server, a new attempt starts over
+                sessionStorage.removeItem(uploadKey(file));
+            }
+            const data = await response.json();
+            if (response.status === 409 && data.offset !== undefined) {
+                // Server has a different offset, continue from there
+                offset = data.offset;
+                continue;
+            }
+            if (!response.ok) {
+                throw new Error(data.error || 'Network response was not ok');
+            }
+            offset = data.offset;
+            retries = 0;
+        } catch (error) {
+            if (!sessionStorage.getItem(uploadKey(file)) || ++retries > MAX_CHUNK_RETRIES) {
+                throw error;
+            }
+            await retryDelay(retries);
+            // Resume from whatever the server has received
+            const serverOffset = await fetchUploadOffset(upload.upload_url);
+            if (serverOffset !== null && serverOffset >= 0) {
+                offset = serverOffset;
+            }
+        }
+    }
+
+    const response = await fetch(`${upload.upload_url}/complete`, {
+        method: 'POST',
+        credentials: 'same-origin'
+    });
+    sessionStorage.removeItem(uploadKey(file));
+    return parseResponse(response);
+}
+
 // Initialize column configuration
 function initializeColumnConfig(headers) {
     console.log('Initializing column config with headers:', headers);
@@ -215,6 +314,7 @@ document.getElementById('downloadButton').addEventListener('click', async () =>
         const tagValue = document.getElementById('tagValue').value;
         const removeDuplicates = document.getElementById('removeDuplicates').checked;
         const removeEmpty = document.getElementById('removeEmpty').checked;
+        const downloadFormat = document.getElementById('downloadFormat').value;
 
         // Get the sorted and filtered column configuration
         const sortedColumns = [...columnConfig].sort((a, b) => a.order - b.order)
@@ -231,6 +331,7 @@ document.getElementById('downloadButton').addEventListener('click', async () =>
         formData.append('tag', tagValue);
         formData.append('remove_duplicates', removeDuplicates);
         formData.append('remove_empty', removeEmpty);
+        formData.append('format', downloadFormat);
 
         const response = await fetch('/download', {
             method: 'POST',
@@ -248,7 +349,10 @@ document.getElementById('downloadButton').addEventListener('click', async () =>
         const a = document.createElement('a');
         a.style.display = 'none';
         a.href = url;
-        a.download = 'processed.csv';
+        const contentDisposition = response.headers.get('Content-Disposition');
+        a.download = contentDisposition
+            ? contentDisposition.split('filename=')[1].replace(/['"]/g, '')
+            : 'processed.csv';
         document.body.appendChild(a);
         a.click();
         
@@ -53,6 +53,9 @@ setup(
             "myst-parser>=3.0.0",
             "furo>=2024.0.0",
         ],
+        "zstd": [
+            "zstandard>=0.15.2",
+        ],
     },
     keywords='csv, sendy, email, contacts, brazil',
     entry_points={
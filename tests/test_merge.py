@@ -0,0 +1,120 @@
+"""Tests for merging and deduplicating CSV files."""
+import gzip
+import os
+import pandas as pd
+import pytest
+from csv2sendy.cli import merge
+from csv2sendy.core.merge import merge_files, merge_processed_files, process_source
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """Create source files with different delimiters and headers."""
+    first = os.path.join(tmp_path, 'first.csv')
+    with open(first, 'w', encoding='utf-8') as f:
+        f.write('Nome;E-mail;Telefone\n'
+                'Joao Silva;JOAO@example.com;11999999999\n'
+                'Ana;ana@example.com;\n'
+                'Sem Email;;\n')
+    second = os.path.join(tmp_path, 'second.csv')
+    with open(second, 'w', encoding='utf-8') as f:
+        f.write('name,email,city\n'
+                'Joao S,joao@example.com,SP\n'
+                'Bia,bia@example.com,RJ\n'
+                '"Ana\nMaria",mailto:ana@example.com,BH\n')
+    third = os.path.join(tmp_path, 'third.csv.gz')
+    with gzip.open(third, 'wt', encoding='utf-8') as f:
+        f.write('email,name\nbia@example.com,Beatriz\nzed@example.com,Zed\n')
+    return [first, second, third]
+
+
+def _read_output(path):
+    """Read a merged file keeping values as text."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_merge_keep_first(sources, tmp_path, workers):
+    """Test merging files keeping the first record of each email."""
+    output = os.path.join(tmp_path, 'merged.csv')
+    stats = merge_files(sources, output, workers=workers, partitions=4)
+    assert stats == {'sources': 3, 'rows': 8, 'duplicates': 3, 'written': 5}
+
+    df = _read_output(output)
+    assert df.columns.tolist() == ['email', 'first_name', 'last_name', 'phone_number', 'city']
+    assert df['email'].tolist() == [
+        'joao@example.com', 'ana@example.com', '', 'bia@example.com', 'zed@example.com'
+    ]
+    assert df['last_name'].tolist()[:2] == ['Silva', '']
+    assert df['city'].tolist()[3] == 'RJ'
+
+
+def test_merge_processed_files(sources, tmp_path):
+    """Test merging files that were already processed."""
+    processed = [os.path.join(tmp_path, f'processed_{i}.csv') for i in range(len(sources))]
+    for path, output in zip(sources, processed):
+        process_source(path, output)
+    output = os.path.join(tmp_path, 'merged.csv')
+    stats = merge_processed_files(processed, output, partitions=4)
+    assert stats == {'sources': 3, 'rows': 8, 'duplicates': 3, 'written': 5}
+
+    expected = os.path.join(tmp_path, 'expected.csv')
+    merge_files(sources, expected, workers=1, partitions=4)
+    assert _read_output(output).equals(_read_output(expected))
+
+    with pytest.raises(ValueError, match='No files to merge'):
+        merge_processed_files([], output)
+
+
+def test_merge_keep_last(sources, tmp_path):
+    """Test merging files keeping the last record of each email."""
+    output = os.path.join(tmp_path, 'merged.csv')
+    merge_files(sources, output, keep='last', workers=1, partitions=4)
+    df = _read_output(output).set_index('email')
+    assert df.loc['joao@example.com', 'city'] == 'SP'
+    assert df.loc['ana@example.com', 'last_name'] == 'Maria'
+    assert df.loc['bia@example.com', 'first_name'] == 'Beatriz'
+
+
+def test_merge_keep_most_complete(sources, tmp_path):
+    """Test merging files keeping the most complete record of each email."""
+    output = os.path.join(tmp_path, 'merged.csv')
+    merge_files(sources, output, keep='most_complete', workers=1, partitions=4)
+    df = _read_output(output).set_index('email')
+    assert df.loc['joao@example.com', 'phone_number'] == '5511999999999'
+    assert df.loc['ana@example.com', 'city'] == 'BH'
+    assert df.loc['bia@example.com', 'city'] == 'RJ'
+
+
+def test_merge_invalid(sources, tmp_path):
+    """Test merge argument validation."""
+    output = os.path.join(tmp_path, 'merged.csv')
+    with pytest.raises(ValueError, match='Invalid keep rule'):
+        merge_files(sources, output, keep='random')
+    with pytest.raises(ValueError, match='No files to merge'):
+        merge_files([], output)
+
+
+def test_merge_reserved_column_names(tmp_path):
+    """Test merging sources with columns named like internal ordering keys."""
+    source = os.path.join(tmp_path, 'source.csv')
+    with open(source, 'w', encoding='utf-8') as f:
+        f.write('email,_source,_row\na@example.com,crm,\nb@example.com,,7\na@example.com,ads,1\n')
+    output = os.path.join(tmp_path, 'merged.csv')
+    stats = merge_files([source], output, workers=1, partitions=2)
+    assert stats['duplicates'] == 1
+
+    df = _read_output(output)
+    assert df.columns.tolist() == ['email', '_source', '_row']
+    assert df.values.tolist() == [['a@example.com', 'crm', ''], ['b@example.com', '', '7']]
+
+
+def test_merge_invalid_partitions(sources, tmp_path):
+    """Test that partitions and workers must be positive."""
+    output = os.path.join(tmp_path, 'merged.csv')
+    with pytest.raises(ValueError, match='Partitions must be at least 1'):
+        merge_files(sources, output, partitions=0)
+    with pytest.raises(ValueError, match='Workers must be at least 1'):
+        merge_files(sources, output, workers=0)
+    with pytest.raises(SystemExit):
+        merge([output, *sources, '--partitions', '0'])
@@ -1,3 +1,4 @@
+import pandas as pd
 from csv2sendy.core.processor import CSVProcessor
 
 
@@ -118,3 +119,56 @@ def test_validate_email_address():
     # Test case sensitivity and whitespace
     assert processor.validate_email_address('  mailto:User@Example.COM  ') == 'user@example.com'
     assert processor.validate_email_address('MAILTO:user@example.com') == 'user@example.com'
+
+
+def test_compact_dataframe():
+    """Test compact representation of processed contacts."""
+    processor = CSVProcessor()
+    csv_content = (
+        'Name,Email,Phone,Source\n'
+        'John Doe,john@example.com,11999999999,ads\n'
+        'John Smith,smith@example.com,invalid,ads\n'
+        'Mary,mary@example.com,,ads\n'
+        'John Roe,,11988888888,ads\n'
+    )
+    df = processor.process_csv(csv_content)
+    compact = processor.process_csv(csv_content, compact=True)
+    assert compact['first_name'].dtype == 'category'
+    assert compact['Source'].dtype == 'category'
+    assert str(compact['email'].dtype) == 'string'
+    assert compact['phone_number'].dtype == 'UInt64'
+    assert compact['phone_number'].iloc[0] == 5511999999999
+    assert compact.to_csv(index=False) == df.to_csv(index=False)
+    assert compact.to_csv(index=False) == df.fillna('').to_csv(index=False)
+    assert processor.to_records(compact) == df.fillna('').to_dict('records')
+
+
+def test_memory_usage():
+    """Test memory usage report."""
+    processor = CSVProcessor()
+    csv_content = 'Name,Email,Phone\n' + 'John Doe,john@example.com,11999999999\n' * 100
+    df = processor.process_csv(csv_content)
+    compact = processor.compact_dataframe(df)
+    usage = processor.memory_usage(compact)
+    assert usage['total'] == sum(size for col, size in usage.items() if col != 'total')
+    assert set(usage) == {'first_name', 'last_name', 'email', 'phone_number', 'total'}
+    assert usage['total'] < processor.memory_usage(df)['total']
+
+
+def test_process_csv_keeps_text():
+    """Test that values are kept as written and phones with gaps are formatted."""
+    processor = CSVProcessor()
+    csv_content = 'Name,Email,Phone,Zip\nJohn,john@example.com,11999999999,01234\nMary,mary@example.com,,02345'
+    df = processor.process_csv(csv_content)
+    assert df['Zip'].tolist() == ['01234', '02345']
+    assert df['phone_number'].tolist() == ['5511999999999', '']
+
+
+def test_process_chunk_matches_process_csv():
+    """Test that processing a file in chunks gives the same result as a whole."""
+    processor = CSVProcessor()
+    header = 'Name,Email,Phone,Zip\n'
+    rows = ['John,john@example.com,11999999999,01234\n', 'Mary,mary@example.com,,02345\n']
+    whole = processor.process_csv(header + ''.join(rows))
+    chunks = pd.concat([processor.process_chunk(header, row, ',') for row in rows], ignore_index=True)
+    assert chunks.to_csv(index=False) == whole.to_csv(index=False)
@@ -0,0 +1,83 @@
+"""Tests for streaming CSV processing and compression."""
+import gzip
+import os
+import pandas as pd
+import pytest
+from csv2sendy.core import CSVProcessor
+from csv2sendy.core.compression import StreamDecompressor, csv_filename, is_compressed
+from csv2sendy.core.streaming import CSVStreamProcessor, find_record_end
+
+
+def test_find_record_end():
+    """Test finding record boundaries outside quoted fields."""
+    assert find_record_end(b'a,b\nc,d\ne,') == 8
+    assert find_record_end(b'a,b\nc,d\ne,', last=False) == 4
+    assert find_record_end(b'"a\nb",c') == 0
+    assert find_record_end(b'"a\nb",c\n') == 8
+    assert find_record_end(b'a,b"c\nd,e\n', last=False) == 6
+    assert find_record_end(b'"a""\n",b\n') == 9
+
+
+def test_stream_processor_stray_quote(tmp_path):
+    """Test that a quote inside an unquoted value matches process_csv."""
+    content = (b'name,email,note\nJoao,joao@x.com,tv 42" led\n'
+               b'"Ana",ana@x.com,"line1\nline2"\nBia,bia@x.com,ok\n')
+    output_path = os.path.join(tmp_path, 'out.csv')
+    csv_stream = CSVStreamProcessor(output_path)
+    for i in range(0, len(content), 5):
+        csv_stream.feed(content[i:i + 5])
+    csv_stream.close()
+
+    df = pd.read_csv(output_path, dtype=str, keep_default_na=False)
+    expected = CSVProcessor().process_csv(content.decode('utf-8'))
+    assert csv_stream.rows == 3
+    assert df['email'].tolist() == ['joao@x.com', 'ana@x.com', 'bia@x.com']
+    assert df.to_dict('records') == expected.to_dict('records')
+
+
+def test_stream_processor(tmp_path):
+    """Test processing CSV fed one byte at a time."""
+    content = b'nome;e-mail;telefone\n"Silva\n Joao";joao@example.com;11999999999\nMaria;;\n'
+    output_path = os.path.join(tmp_path, 'out.csv')
+    csv_stream = CSVStreamProcessor(output_path)
+    for i in range(len(content)):
+        csv_stream.feed(content[i:i + 1])
+    csv_stream.close()
+
+    df = pd.read_csv(output_path, dtype=str, keep_default_na=False)
+    assert csv_stream.rows == 2
+    assert df.columns.tolist() == ['email', 'first_name', 'last_name', 'phone_number']
+    assert df['first_name'].tolist() == ['Silva', 'Maria']
+    assert df['phone_number'].tolist() == ['5511999999999', '']
+
+
+def test_stream_processor_empty(tmp_path):
+    """Test that empty input is rejected."""
+    csv_stream = CSVStreamProcessor(os.path.join(tmp_path, 'out.csv'))
+    with pytest.raises(ValueError, match='Empty file'):
+        csv_stream.close()
+
+
+def test_stream_decompressor():
+    """Test incremental gzip decompression across concatenated members."""
+    data = gzip.compress(b'name,email\n') + gzip.compress(b'John,john@example.com\n')
+    decompressor = StreamDecompressor('test.csv.gz')
+    output = b''.join(decompressor.decompress(data[i:i + 7]) for i in range(0, len(data), 7))
+    assert output + decompressor.flush() == b'name,email\nJohn,john@example.com\n'
+
+    truncated = StreamDecompressor('test.csv.gz')
+    truncated.decompress(data[:10])
+    with pytest.raises(ValueError, match='Truncated gzip file'):
+        truncated.flush()
+
+    assert StreamDecompressor('test.csv').decompress(b'a,b\n') == b'a,b\n'
+
+
+def test_compressed_filenames():
+    """Test compressed filename helpers."""
+    assert is_compressed('leads.csv.gz')
+    assert is_compressed('leads.ZIP')
+    assert not is_compressed('leads.csv')
+    assert csv_filename('leads.csv.gz') == 'leads.csv'
+    assert csv_filename('leads.zip') == 'leads.csv'
+    assert csv_filename('leads.csv') == 'leads.csv'
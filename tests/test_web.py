@@ -5,8 +5,12 @@ import pytest
 import tempfile
 import shutil
 import json
+import time
+import gzip
+import zipfile
 from io import BytesIO
-from csv2sendy.web.app import app, TEMP_DIR, cleanup_temp_files
+from csv2sendy.core.streaming import CSVStreamProcessor
+from csv2sendy.web.app import app, TEMP_DIR, cleanup_temp_files, _upload_locks, _upload_workers
 
 
 @pytest.fixture
@@ -74,6 +78,18 @@ def test_upload_utf8_encoding(client):
     assert b'File processed successfully' in response.data
 
 
+def test_upload_stray_quote(client):
+    """Test upload route with a quote inside an unquoted value."""
+    csv_content = ('name,email,note\nJoao,joao@x.com,tv 42" led\n'
+                   '"Ana",ana@x.com,"line1\nline2"\nBia,bia@x.com,ok\n')
+    response = client.post('/upload', data={
+        'file': (BytesIO(csv_content.encode('utf-8')), 'test.csv')
+    })
+    assert response.status_code == 200
+    result = json.loads(response.data)
+    assert [row['email'] for row in result['data']] == ['joao@x.com', 'ana@x.com', 'bia@x.com']
+
+
 def test_upload_invalid_encoding(client):
     """Test upload route with invalid encoding."""
     csv_content = b'Name,Email,Phone\n\xff\xff,test@example.com,5511999999999\n'
@@ -82,6 +98,7 @@ def test_upload_invalid_encoding(client):
     })
     assert response.status_code == 500
     assert b'Invalid file encoding' in response.data
+    assert not os.listdir(app.config['UPLOAD_FOLDER'])
 
 
 def test_download_missing_file(client):
@@ -132,3 +149,349 @@ def test_download_valid_file(client):
         # Clean up test file
         if os.path.exists(filepath):
             os.remove(filepath)
+
+
+def _start_upload(client, filename='test.csv'):
+    """Start a chunked upload and return its id."""
+    response = client.post('/uploads', json={'filename': filename})
+    assert response.status_code == 201
+    return response.get_json()['upload_id']
+
+
+def test_chunked_upload(client):
+    """Test chunked upload split in the middle of records."""
+    csv_content = (
+        'name,email,phone\n'
+        'John Doe,john@example.com,11999999999\n'
+        '"Mary\nJane",mary@example.com,11988888888\n'
+        'Peter,peter@example.com,'
+    ).encode('utf-8')
+    upload_id = _start_upload(client)
+
+    offset = 0
+    for size in (10, 30, 25, len(csv_content)):
+        chunk = csv_content[offset:offset + size]
+        response = client.put(f'/uploads/{upload_id}?offset={offset}', data=chunk)
+        assert response.status_code == 200
+        offset += len(chunk)
+        assert response.get_json()['offset'] == offset
+
+    response = client.post(f'/uploads/{upload_id}/complete')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['message'] == 'File processed successfully'
+    assert data['headers'] == ['email', 'first_name', 'last_name', 'phone_number']
+    assert [row['first_name'] for row in data['data']] == ['John', 'Mary', 'Peter']
+    assert data['data'][0]['phone_number'] == '5511999999999'
+    assert data['data'][2]['phone_number'] == ''
+
+    processed = [f for f in os.listdir(app.config['UPLOAD_FOLDER']) if f.endswith('.csv')]
+    assert len(processed) == 1
+    assert processed[0].startswith('processed_')
+
+
+def test_chunked_upload_resume(client):
+    """Test resuming a chunked upload after an offset mismatch."""
+    upload_id = _start_upload(client)
+    client.put(f'/uploads/{upload_id}?offset=0', data=b'name,email\n')
+
+    response = client.put(f'/uploads/{upload_id}?offset=0', data=b'name,email\n')
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 11
+
+    response = client.get(f'/uploads/{upload_id}')
+    assert response.status_code == 200
+    offset = response.get_json()['offset']
+
+    response = client.put(f'/uploads/{upload_id}?offset={offset}', data=b'John,john@example.com\n')
+    assert response.status_code == 200
+    response = client.post(f'/uploads/{upload_id}/complete')
+    assert response.status_code == 200
+    assert response.get_json()['data'][0]['email'] == 'john@example.com'
+
+
+def test_upload_paths_write_same_file(client):
+    """Test that plain, chunked and compressed uploads write the same file."""
+    csv_content = (
+        'name,email,phone,Zip\n'
+        'John Doe,john@example.com,11999999999,01234\n'
+        'Mary,mary@example.com,,02345\n'
+    ).encode('utf-8')
+
+    def processed_file():
+        """Read and remove the processed file of the last upload."""
+        folder = app.config['UPLOAD_FOLDER']
+        filename = [f for f in os.listdir(folder) if f.startswith('processed_')][0]
+        with open(os.path.join(folder, filename), 'rb') as f:
+            content = f.read()
+        os.remove(os.path.join(folder, filename))
+        return content
+
+    response = client.post('/upload', data={'file': (BytesIO(csv_content), 'a.csv')})
+    assert response.status_code == 200
+    plain = processed_file()
+    assert b'01234' in plain
+    assert b'5511999999999' in plain
+
+    upload_id = _start_upload(client, 'b.csv.gz')
+    client.put(f'/uploads/{upload_id}?offset=0', data=gzip.compress(csv_content))
+    assert client.post(f'/uploads/{upload_id}/complete').status_code == 200
+    assert processed_file() == plain
+
+    compressed = client.post('/upload', data={'file': (BytesIO(gzip.compress(csv_content)), 'c.csv.gz')})
+    assert compressed.status_code == 200
+    assert processed_file() == plain
+    assert compressed.get_json()['data'] == response.get_json()['data']
+    assert compressed.get_json()['headers'] == response.get_json()['headers']
+
+
+def test_upload_preview_rows(client):
+    """Test that uploads return a bounded preview of the processed rows."""
+    csv_content = 'name,email\n' + 'John Doe,john@example.com\n' * (app.config['PREVIEW_ROWS'] + 5)
+    response = client.post('/upload', data={'file': (BytesIO(csv_content.encode('utf-8')), 'test.csv')})
+    assert response.status_code == 200
+    assert len(response.get_json()['data']) == app.config['PREVIEW_ROWS']
+
+
+def test_chunked_upload_after_complete(client):
+    """Test that a completed upload releases its state and rejects chunks."""
+    upload_id = _start_upload(client)
+    client.put(f'/uploads/{upload_id}?offset=0', data=b'name,email\nJohn,john@example.com\n')
+    response = client.post(f'/uploads/{upload_id}/complete')
+    assert response.status_code == 200
+    assert upload_id not in _upload_workers
+    assert upload_id not in _upload_locks
+
+    response = client.put(f'/uploads/{upload_id}?offset=34', data=b'Mary,mary@example.com\n')
+    assert response.status_code == 404
+    response = client.post(f'/uploads/{upload_id}/complete')
+    assert response.status_code == 404
+    assert not [f for f in os.listdir(app.config['UPLOAD_FOLDER']) if f.startswith('upload_')]
+
+
+def test_chunked_upload_expiry(client):
+    """Test that idle uploads are removed when a new upload starts."""
+    stale_id = _start_upload(client)
+    client.put(f'/uploads/{stale_id}?offset=0', data=b'name,email\n')
+    part_path = os.path.join(app.config['UPLOAD_FOLDER'], f'upload_{stale_id}.part')
+    expired = time.time() - app.config['UPLOAD_EXPIRY'] - 1
+    os.utime(part_path, (expired, expired))
+
+    active_id = _start_upload(client)
+    assert client.get(f'/uploads/{stale_id}').status_code == 404
+    assert client.get(f'/uploads/{active_id}').status_code == 200
+    assert stale_id not in _upload_workers
+    assert not [f for f in os.listdir(app.config['UPLOAD_FOLDER']) if stale_id in f]
+
+
+def test_chunked_upload_invalid_requests(client):
+    """Test chunked upload error handling."""
+    response = client.post('/uploads', json={'filename': 'test.txt'})
+    assert response.status_code == 400
+    assert b'Invalid file type' in response.data
+
+    response = client.get('/uploads/unknown')
+    assert response.status_code == 404
+
+    upload_id = _start_upload(client)
+    response = client.put(f'/uploads/{upload_id}', data=b'name\n')
+    assert response.status_code == 400
+    assert b'No offset provided' in response.data
+
+
+def test_chunked_upload_invalid_encoding(client):
+    """Test chunked upload with invalid encoding."""
+    upload_id = _start_upload(client)
+    client.put(f'/uploads/{upload_id}?offset=0', data=b'Name,Email\n\xff\xff,test@example.com\n')
+    response = client.post(f'/uploads/{upload_id}/complete')
+    assert response.status_code == 500
+    assert b'Invalid file encoding' in response.data
+
+
+def test_upload_gzip_csv(client):
+    """Test upload endpoint with a gzip compressed CSV file."""
+    csv_content = 'name,email,phone\nJohn Doe,john@example.com,11999999999\n'
+    data = {'file': (BytesIO(gzip.compress(csv_content.encode('utf-8'))), 'test.csv.gz')}
+    response = client.post('/upload', data=data)
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['data'][0]['email'] == 'john@example.com'
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == [result['download_url'].split('filename=')[1]]
+
+
+def test_upload_zip_csv(client):
+    """Test upload endpoint with a zipped CSV file."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('leads.csv', 'name,email\nJohn Doe,john@example.com\n')
+    buffer.seek(0)
+    response = client.post('/upload', data={'file': (buffer, 'test.zip')})
+    assert response.status_code == 200
+    assert response.get_json()['data'][0]['first_name'] == 'John'
+
+
+def test_chunked_upload_gzip(client):
+    """Test chunked upload of a gzip compressed CSV file."""
+    csv_content = 'name,email\n' + 'John Doe,john@example.com\n' * 1000
+    compressed = gzip.compress(csv_content.encode('utf-8'))
+    upload_id = _start_upload(client, 'test.csv.gz')
+    for offset in range(0, len(compressed), 50):
+        response = client.put(f'/uploads/{upload_id}?offset={offset}', data=compressed[offset:offset + 50])
+        assert response.status_code == 200
+    response = client.post(f'/uploads/{upload_id}/complete')
+    assert response.status_code == 200
+    assert len(response.get_json()['data']) == app.config['PREVIEW_ROWS']
+
+    processed = [f for f in os.listdir(app.config['UPLOAD_FOLDER']) if f.endswith('.csv')]
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], processed[0]), encoding='utf-8') as f:
+        assert len(f.readlines()) == 1001
+
+
+def _download_data():
+    """Create an uploaded file and return download form data."""
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'test.csv')
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write('name,email\nJohn Doe,john@example.com')
+    return {
+        'columns': json.dumps([
+            {'originalName': 'name', 'mappedName': 'first_name'},
+            {'originalName': 'email', 'mappedName': 'email'}
+        ])
+    }
+
+
+def test_download_compressed_formats(client):
+    """Test downloading gzip and zip compressed files."""
+    data = _download_data()
+    data['format'] = 'gz'
+    response = client.post('/download', data=data)
+    assert response.status_code == 200
+    assert 'processed.csv.gz' in response.headers['Content-Disposition']
+    assert gzip.decompress(response.data).startswith(b'name,email')
+
+    data = _download_data()
+    data['format'] = 'zip'
+    response = client.post('/download', data=data)
+    assert response.status_code == 200
+    with zipfile.ZipFile(BytesIO(response.data)) as archive:
+        assert archive.read('processed.csv').startswith(b'name,email')
+
+    data = _download_data()
+    data['format'] = 'rar'
+    response = client.post('/download', data=data)
+    assert response.status_code == 400
+    assert b'Unsupported format' in response.data
+
+
+def test_download_accept_encoding(client):
+    """Test gzip content encoding of downloads."""
+    response = client.post('/download', data=_download_data(), headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'text/csv' in response.headers['Content-Type']
+    assert gzip.decompress(response.data).startswith(b'name,email')
+
+
+def test_download_keeps_text_values(client):
+    """Test that downloads keep leading zeros and do not turn phones into floats."""
+    csv_content = ('name,email,phone,Zip\nJohn Doe,john@example.com,11999999999,01234\n'
+                   'Ana,ana@example.com,,04567\nNo Email,,,05678\n')
+    response = client.post('/upload', data={
+        'file': (BytesIO(csv_content.encode('utf-8')), 'test.csv')
+    })
+    assert response.status_code == 200
+
+    response = client.post('/download', data={
+        'columns': json.dumps([
+            {'originalName': 'email', 'mappedName': 'email'},
+            {'originalName': 'phone_number', 'mappedName': 'phone_number'},
+            {'originalName': 'Zip', 'mappedName': 'Zip'}
+        ]),
+        'remove_empty': 'true'
+    })
+    assert response.status_code == 200
+    assert response.data.decode('utf-8').splitlines() == [
+        'email,phone_number,Zip',
+        'john@example.com,5511999999999,01234',
+        'ana@example.com,,04567'
+    ]
+
+
+def _send_upload(client, filename, content):
+    """Send a whole file as a chunked upload without completing it."""
+    upload_id = _start_upload(client, filename)
+    response = client.put(f'/uploads/{upload_id}?offset=0', data=content)
+    assert response.status_code == 200
+    return upload_id
+
+
+def _wait_for_merge(client, status_url):
+    """Poll a merge job until it finishes."""
+    for _ in range(300):
+        response = client.get(status_url)
+        if response.status_code != 202:
+            return response
+        time.sleep(0.1)
+    raise AssertionError('Merge job did not finish')
+
+
+def test_merge_uploads(client, monkeypatch):
+    """Test merging several chunked uploads in a background job."""
+    fed = []
+    feed = CSVStreamProcessor.feed
+    monkeypatch.setattr(CSVStreamProcessor, 'feed', lambda self, data: fed.append(data) or feed(self, data))
+    upload_ids = [
+        _send_upload(client, 'first.csv', b'nome;e-mail\nJohn Doe;john@example.com\n'),
+        _send_upload(client, 'second.csv.gz',
+                     gzip.compress(b'email,name\nJOHN@example.com,Johnny\nmary@example.com,Mary\n'))
+    ]
+    response = client.post('/merge', json={'upload_ids': upload_ids, 'keep': 'last'})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] == 'queued'
+
+    response = _wait_for_merge(client, job['status_url'])
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['status'] == 'done'
+    assert result['stats'] == {'sources': 2, 'rows': 3, 'duplicates': 1, 'written': 2}
+    assert [row['first_name'] for row in result['data']] == ['Johnny', 'Mary']
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == [result['download_url'].split('filename=')[1]]
+
+    # The uploads now belong to the job
+    assert client.get(f'/uploads/{upload_ids[0]}').status_code == 404
+
+    # Records processed while the chunks arrived are not processed again
+    assert len(b''.join(fed)) == len(b'nome;e-mail\nJohn Doe;john@example.com\n'
+                                     b'email,name\nJOHN@example.com,Johnny\nmary@example.com,Mary\n')
+
+
+def test_merge_failed_job(client):
+    """Test that a failing merge job reports its error."""
+    upload_id = _send_upload(client, 'first.csv', b'name,city\nJohn,SP\n')
+    response = client.post('/merge', json={'upload_ids': [upload_id]})
+    response = _wait_for_merge(client, response.get_json()['status_url'])
+    assert response.status_code == 500
+    assert response.get_json()['error'] == 'No email column found'
+    assert not os.listdir(app.config['UPLOAD_FOLDER'])
+
+
+def test_merge_invalid_requests(client):
+    """Test merge endpoint error handling."""
+    response = client.post('/merge')
+    assert response.status_code == 400
+    assert b'No uploads provided' in response.data
+
+    response = client.post('/merge', json={'upload_ids': ['f' * 32]})
+    assert response.status_code == 404
+    assert b'Upload not found' in response.data
+
+    upload_id = _send_upload(client, 'test.csv', b'email\na@example.com\n')
+    response = client.post('/merge', json={'upload_ids': [upload_id], 'keep': 'random'})
+    assert response.status_code == 400
+    assert b'Invalid keep rule' in response.data
+
+    response = client.post('/merge', json={'upload_ids': [upload_id, upload_id]})
+    assert response.status_code == 400
+
+    assert client.get('/merge/unknown').status_code == 404